@@ -9,7 +9,9 @@ import math
 import os
 import random
 import re
+import sys
 
+import numpy as np
 import tensorflow as tf
 
 import gpm.pipeline
@@ -48,7 +50,7 @@ def seed(key: str) -> int:
 # VOCABULARY ##################################################################
 
 def compose(lower: bool=True, upper: bool=True, digits: bool=True, symbols: bool=False) -> str:
-    return sorted(set(lower * VOCABULARY_ALPHA_LOWER + upper * VOCABULARY_ALPHA_UPPER + digits * VOCABULARY_NUMBERS + symbols * VOCABULARY_SYMBOLS))
+    return ''.join(sorted(set(lower * VOCABULARY_ALPHA_LOWER + upper * VOCABULARY_ALPHA_UPPER + digits * VOCABULARY_NUMBERS + symbols * VOCABULARY_SYMBOLS)))
 
 # MODEL #######################################################################
 
@@ -58,6 +60,7 @@ def create_model(
     n_output_dim: int,
     n_context_dim: int=N_CONTEXT_DIM,
     n_embedding_dim: int=N_EMBEDDING_DIM,
+    compiled: bool=True,
 ) -> tf.keras.Model:
     __model = tf.keras.Sequential()
     # initialize the weights
@@ -69,21 +72,23 @@ def create_model(
     __model.add(tf.keras.layers.Reshape(target_shape=(n_context_dim * n_embedding_dim,), input_shape=(n_context_dim, n_embedding_dim), name='reshape'))
     __model.add(tf.keras.layers.Dense(units=n_output_dim, activation='tanh', use_bias=False, kernel_initializer=__dense_init, name='head'))
     __model.add(tf.keras.layers.Softmax(axis=-1, name='softmax'))
-    # compile
-    __model.compile(
-        optimizer=tf.keras.optimizers.Adam(learning_rate=0.0001),
-        loss=tf.keras.losses.CategoricalCrossentropy(from_logits=False, label_smoothing=0., axis=-1, reduction=tf.keras.losses.Reduction.SUM_OVER_BATCH_SIZE, name='loss'))
+    # compile, only required for training
+    if compiled:
+        __model.compile(
+            optimizer=tf.keras.optimizers.Adam(learning_rate=0.0001),
+            loss=tf.keras.losses.CategoricalCrossentropy(from_logits=False, label_smoothing=0., axis=-1, reduction=tf.keras.losses.Reduction.SUM_OVER_BATCH_SIZE, name='loss'))
     return __model
 
 # PREPROCESS ##################################################################
 
+PATTERN_PREFIX = re.compile(pattern=r'^((?:ftp|https?):\/\/)', flags=re.IGNORECASE)
+PATTERN_SUFFIX = re.compile(pattern=r'(\/+)$', flags=re.IGNORECASE)
+
 def remove_prefix(text: str) -> str:
-    __r = r'^((?:ftp|https?):\/\/)'
-    return re.sub(pattern=__r, repl='', string=text, flags=re.IGNORECASE)
+    return PATTERN_PREFIX.sub(repl='', string=text)
 
 def remove_suffix(text: str) -> str:
-    __r = r'(\/+)$'
-    return re.sub(pattern=__r, repl='', string=text, flags=re.IGNORECASE)
+    return PATTERN_SUFFIX.sub(repl='', string=text)
 
 def remove_spaces(text: str) -> str:
     return text.replace(' ', '').replace('\t', '')
@@ -105,13 +110,13 @@ def feed(source: list, nonce: int, dimension: int) -> iter:
 # INPUTS ######################################################################
 
 def tensor(feed: 'Iterable[int]', length: int, context: int) -> tf.Tensor:
-    __x = [[next(feed) for _ in range(context)] for _ in range(length)]
-    return tf.constant(tf.convert_to_tensor(value=__x, dtype=tf.dtypes.int32))
+    __x = np.fromiter(itertools.islice(feed, length * context), dtype=np.int32, count=length * context)
+    return tf.convert_to_tensor(value=__x.reshape((length, context)), dtype=tf.dtypes.int32)
 
 # OUTPUTS #####################################################################
 
 def password(model: tf.keras.Model, x: tf.Tensor, itos: callable) -> str:
-    __y = tf.squeeze(model(x, training=False))
+    __y = model(x, training=False) # shape (length, n_output_dim)
     __p = list(tf.argmax(__y, axis=-1).numpy())
     return gpm.pipeline.decode(__p, itos=itos)
 
@@ -129,7 +134,8 @@ def process(
     include_symbols: bool,
     input_vocabulary: str=INPUT_VOCABULARY,
     model_context_dim: int=N_CONTEXT_DIM,
-    model_embedding_dim: int=N_EMBEDDING_DIM
+    model_embedding_dim: int=N_EMBEDDING_DIM,
+    model_factory: callable=create_model
 ) -> str:
     # seed to generate the model weights randomly
     __seed = seed(key=master_key)
@@ -146,11 +152,31 @@ def process(
     __feed = feed(source=__source, nonce=password_nonce, dimension=__input_dim)
     __x = tensor(feed=__feed, length=password_length, context=model_context_dim)
     # model
-    __model = create_model(seed=__seed, n_input_dim=__input_dim, n_output_dim=__output_dim, n_context_dim=model_context_dim, n_embedding_dim=model_embedding_dim)
+    __model = model_factory(seed=__seed, n_input_dim=__input_dim, n_output_dim=__output_dim, n_context_dim=model_context_dim, n_embedding_dim=model_embedding_dim, compiled=False)
     # password
     __password = password(model=__model, x=__x, itos=__output_mappings['decode'])
     return __password
 
+# DAEMON ######################################################################
+
+def serve(stream: 'Iterable[str]', **kwargs) -> None:
+    # reuse the model while the requests come from the same master key, only for the lifetime of the loop
+    __create = functools.lru_cache(maxsize=1)(create_model)
+    # the arguments given in each request override the defaults in kwargs
+    __process = functools.partial(process, model_factory=__create, **kwargs)
+    try:
+        for __line in stream:
+            __password = ''
+            __fields = __line.rstrip('\r\n').split('\t')
+            # malformed request, answer with an empty line
+            if len(__fields) == 3:
+                __password = __process(master_key=__fields[0], login_target=__fields[1], login_id=__fields[2])
+            # one password per request
+            print(__password, flush=True)
+    finally:
+        # forget the model and the seed of the last master key
+        __create.cache_clear()
+
 # CLI #########################################################################
 
 def main():
@@ -167,9 +193,19 @@ def main():
     __parser.add_argument('--upper', '-A', action='store_false', dest='include_upper', default=True, help='exclude uppercase letters from the password')
     __parser.add_argument('--digits', '-d', action='store_false', dest='include_digits', default=True, help='exclude digits from the password')
     __parser.add_argument('--symbols', '-s', action='store_true', dest='include_symbols', default=False, help='include symbols in the password')
+    __parser.add_argument('--daemon', '-D', action='store_true', dest='daemon', default=False, help='read "key<TAB>target<TAB>id" lines from stdin and print one password per line')
     # parse
     try:
         __args = vars(__parser.parse_args())
+        # serve the requests from stdin, without reloading tensorflow
+        if __args.pop('daemon', False):
+            serve(
+                stream=sys.stdin,
+                input_vocabulary=INPUT_VOCABULARY,
+                model_context_dim=N_CONTEXT_DIM,
+                model_embedding_dim=N_EMBEDDING_DIM,
+                **__args)
+            return
         # fill the missing arguments
         if not __args.get('master_key', ''):
             __args['master_key'] = input('> Master key:\n')
@@ -1,6 +1,9 @@
+import functools
+
 # MAPPINGS ####################################################################
 
-def mappings(vocabulary: list) -> dict:
+@functools.lru_cache(maxsize=8)
+def mappings(vocabulary: str) -> dict:
     __itos = {__i: __c for __i, __c in enumerate(vocabulary)}
     __stoi = {__c: __i for __i, __c in enumerate(vocabulary)}
     # blank placeholder
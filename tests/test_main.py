@@ -0,0 +1,19 @@
+import io
+
+import gpm.main
+
+# DAEMON ######################################################################
+
+def test_serve_answers_one_line_per_request(capsys):
+    __stream = io.StringIO(
+        'never seen before combination of letters\thttp://example.com\tuser@e.mail\n'
+        'malformed request without tabs\n')
+    gpm.main.serve(
+        stream=__stream,
+        password_length=16,
+        password_nonce=1,
+        include_lower=True,
+        include_upper=True,
+        include_digits=True,
+        include_symbols=False)
+    assert capsys.readouterr().out.splitlines() == ['YRLabEDKqWQrN6JF', '']